@@ -7,9 +7,24 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import numpy as np
 import os
+import io
+import csv
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pyarrow import csv as pacsv
+from config import WEB_CONFIG
+
+# Plotly图表序列化使用orjson（C实现，原生支持numpy数组）；未安装时沿用默认引擎
+try:
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = 'orjson'
+except ImportError:
+    pass
 
 # 页面配置
 st.set_page_config(
@@ -19,6 +34,26 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# 前端渲染上限：超过该规模时截断后再交给Plotly/表格组件
+HEATMAP_MAX_ROWS = 50
+TABLE_MAX_ROWS = 1000
+
+# 读取列及其类型：未列出的列在解析阶段即被跳过，不进入下游分组/透视；
+# 毫秒级计时用float32精度足够，内存与带宽减半；
+# 低基数字符串列在解析时直接字典编码，转换后即为分类类型，不生成Python字符串对象
+CATEGORY_TYPE = pa.dictionary(pa.int32(), pa.string())
+COLUMN_TYPES = {
+    'database': CATEGORY_TYPE,
+    'query_type': CATEGORY_TYPE,
+    'query_name': CATEGORY_TYPE,
+    'execution_time_ms': pa.float32(),
+    'execution_std_ms': pa.float32(),
+    'query_time_ms': pa.float32(),
+    'return_time_ms': pa.float32(),
+    'rows_returned': pa.int32(),
+    'return_ratio': pa.float32()
+}
+
 # 自定义CSS
 st.markdown("""
 <style>
@@ -45,6 +80,54 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def _resolve_data_file(csv_file):
+    """返回实际要读取的文件：同名Parquet存在且不早于CSV时优先使用"""
+    parquet_file = os.path.splitext(csv_file)[0] + '.parquet'
+    if os.path.exists(parquet_file):
+        if not os.path.exists(csv_file) or os.path.getmtime(parquet_file) >= os.path.getmtime(csv_file):
+            return parquet_file
+    if os.path.exists(csv_file):
+        return csv_file
+    return None
+
+def _read_table(file):
+    """读取结果文件为Arrow表，数值列统一为COLUMN_TYPES中的类型，行数不超过WEB_CONFIG['max_rows']"""
+    max_rows = WEB_CONFIG.get('max_rows')
+    if file.endswith('.parquet'):
+        available = pq.read_schema(file).names
+        table = pq.read_table(file, columns=[name for name in available if name in COLUMN_TYPES])
+        for name, dtype in COLUMN_TYPES.items():
+            if name in table.column_names:
+                column = table[name]
+                if pa.types.is_dictionary(dtype):
+                    column = column if pa.types.is_dictionary(column.type) else column.dictionary_encode()
+                else:
+                    column = column.cast(dtype)
+                index = table.schema.get_field_index(name)
+                table = table.set_column(index, name, column)
+        return table if max_rows is None else table.slice(0, max_rows)
+    read_options = pacsv.ReadOptions(block_size=8 << 20, use_threads=True)
+    with open(file, encoding='utf-8-sig', newline='') as f:
+        available = next(csv.reader(f), [])
+    convert_options = pacsv.ConvertOptions(
+        column_types=COLUMN_TYPES,
+        include_columns=[name for name in available if name in COLUMN_TYPES]
+    )
+    if max_rows is None or os.path.getsize(file) <= WEB_CONFIG['stream_threshold_bytes']:
+        table = pacsv.read_csv(file, read_options=read_options, convert_options=convert_options)
+        return table if max_rows is None else table.slice(0, max_rows)
+    # 大文件按批流式解析，行数达到上限后不再读取剩余部分
+    batches = []
+    num_rows = 0
+    with pacsv.open_csv(file, read_options=read_options, convert_options=convert_options) as reader:
+        for batch in reader:
+            batches.append(batch)
+            num_rows += batch.num_rows
+            if num_rows >= max_rows:
+                break
+        schema = reader.schema
+    return pa.Table.from_batches(batches, schema=schema).slice(0, max_rows)
+
 @st.cache_data
 def load_data():
     """加载数据"""
@@ -54,15 +137,262 @@ def load_data():
         'data/sample_performance.csv'
     ]
     
-    for file in data_files:
-        if os.path.exists(file):
-            df = pd.read_csv(file)
-            # 计算返回时间占比
-            df['return_ratio'] = (df['return_time_ms'] / df['execution_time_ms'] * 100).round(2)
+    for candidate in data_files:
+        file = _resolve_data_file(candidate)
+        if file is not None:
+            table = _read_table(file)
+            # 返回时间占比由数据生成脚本写入；旧结果文件缺少该列时在Arrow内补算
+            if 'return_ratio' not in table.column_names:
+                return_ratio = pc.round(
+                    pc.multiply(
+                        pc.divide(table['return_time_ms'], table['execution_time_ms']),
+                        pa.scalar(100, pa.float32())
+                    ),
+                    2
+                )
+                table = table.append_column('return_ratio', return_ratio)
+            # 字典编码列转为pandas分类类型，其余列使用Arrow扩展类型
+            df = table.to_pandas(
+                types_mapper=lambda t: None if pa.types.is_dictionary(t) else pd.ArrowDtype(t)
+            )
+            # 分类列的筛选/分组比较整数编码而非逐行比较字符串；类别按字母排序，与原先顺序一致
+            for col in ('database', 'query_type', 'query_name'):
+                df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+            # 记录数据文件修改时间，作为下游聚合缓存的键
+            df.attrs['source_mtime'] = os.path.getmtime(file)
             return df, file
     
     return None, None
 
+# ============================================================================
+# 聚合结果缓存
+# 参数 _df 不参与哈希，缓存以 data_key = (数据文件修改时间, 选中数据库) 为键，
+# 因此侧边栏交互触发的重跑直接命中缓存，不再重复 groupby / pivot_table
+# ============================================================================
+
+@st.cache_data(show_spinner=False)
+def _agg_by_db(_df, data_key):
+    """各数据库聚合指标表，一次分组同时得到执行时间均值/标准差/极值和返回占比均值"""
+    return _df.groupby('database', observed=True).agg(
+        exec_mean=('execution_time_ms', 'mean'),
+        exec_std=('execution_time_ms', 'std'),
+        exec_min=('execution_time_ms', 'min'),
+        exec_max=('execution_time_ms', 'max'),
+        ret_mean=('return_ratio', 'mean')
+    )
+
+@st.cache_data(show_spinner=False)
+def _mean_pivot(_df, data_key, values):
+    """(查询类型, 查询) × 数据库 的均值透视表；各页面用 .xs 按查询类型切片复用"""
+    return _df.pivot_table(
+        values=values,
+        index=['query_type', 'query_name'],
+        columns='database',
+        aggfunc='mean',
+        observed=True
+    )
+
+@st.cache_data(show_spinner=False)
+def _stats_by_db(_df, data_key, query_type):
+    """指定查询类型下各数据库执行时间统计"""
+    type_df = _df[_df['query_type'] == query_type]
+    stats = type_df.groupby('database', observed=True)['execution_time_ms'].agg(['mean', 'min', 'max', 'std'])
+    # float32 直接 round 仍带二进制尾数（如100.050003），先转 float64 再保留两位
+    return stats.astype('float64').round(2)
+
+@st.cache_data(show_spinner=False)
+def _type_comparison(_df, data_key):
+    """各数据库按查询类型的平均执行时间"""
+    return _df.groupby(['database', 'query_type'], observed=True)['execution_time_ms'].mean().unstack(fill_value=0)
+
+@st.cache_data(show_spinner=False)
+def _radar_metrics(_df, data_key):
+    """雷达图各维度分数（归一化），每行一个数据库"""
+    agg = _agg_by_db(_df, data_key)[['exec_mean', 'exec_std', 'ret_mean']]
+    totals = [
+        _df['execution_time_ms'].mean(),
+        _df['execution_time_ms'].std(),
+        _df['return_ratio'].mean()
+    ]
+    scores = 100 - agg.div(totals) * 100
+    scores.columns = ['平均速度', '稳定性', '返回效率']
+    return scores
+
+# ============================================================================
+# 图表构建缓存
+# 各页面的Plotly图表在缓存函数中构建，返回 {名称: 图表}；
+# 页面函数只负责布局和渲染，切换页面或重复交互时直接复用已构建的图表
+# ============================================================================
+
+@st.cache_data(show_spinner=False)
+def _overview_figures(_df, data_key):
+    """总览页图表"""
+    avg_by_db = _agg_by_db(_df, data_key)['exec_mean'].sort_values()
+    avg_fig = px.bar(
+        x=avg_by_db.values,
+        y=avg_by_db.index,
+        orientation='h',
+        labels={'x': '平均执行时间 (ms)', 'y': '数据库'},
+        color=avg_by_db.values,
+        color_continuous_scale='RdYlGn_r'
+    )
+    avg_fig.update_layout(showlegend=False, height=400)
+    
+    # 分类列的value_counts会列出计数为0的类别，改用observed分组计数
+    query_type_counts = _df.groupby('query_type', observed=True).size().sort_values(ascending=False)
+    type_fig = px.pie(
+        values=query_type_counts.values,
+        names=query_type_counts.index,
+        hole=0.4
+    )
+    type_fig.update_layout(height=400)
+    
+    # 热力图按查询名称汇总各查询类型（每个组合仅一条记录时与直接透视结果相同）
+    pivot_data = _mean_pivot(_df, data_key, 'execution_time_ms').groupby(level='query_name', observed=True).mean()
+    if len(pivot_data) > HEATMAP_MAX_ROWS:
+        # 仅保留跨数据库差异最大的查询，保持原有顺序
+        top_rows = pivot_data.var(axis=1).nlargest(HEATMAP_MAX_ROWS).index
+        pivot_data = pivot_data[pivot_data.index.isin(top_rows)]
+    # 直接构建单个Heatmap轨迹（整幅以图像绘制），省去px.imshow的通用图像处理
+    heatmap_fig = go.Figure(go.Heatmap(
+        z=pivot_data.to_numpy(dtype=float, na_value=np.nan),
+        x=pivot_data.columns.astype(str),
+        y=pivot_data.index.astype(str),
+        colorscale='RdYlGn_r',
+        colorbar=dict(title='执行时间 (ms)'),
+        hovertemplate='数据库: %{x}<br>查询: %{y}<br>执行时间 (ms): %{z:.2f}<extra></extra>'
+    ))
+    heatmap_fig.update_layout(
+        xaxis_title='数据库',
+        yaxis=dict(title='查询', autorange='reversed'),
+        height=600
+    )
+    
+    return {'avg_by_db': avg_fig, 'query_types': type_fig, 'heatmap': heatmap_fig}
+
+@st.cache_data(show_spinner=False)
+def _simple_query_figures(_df, data_key):
+    """简单查询页图表"""
+    simple_df = _df[_df['query_type'] == 'simple']
+    exec_fig = px.bar(
+        simple_df,
+        x='query_name',
+        y='execution_time_ms',
+        color='database',
+        barmode='group',
+        log_y=True,
+        labels={'execution_time_ms': '执行时间 (ms)', 'query_name': '查询'},
+        title='简单查询执行时间对比'
+    )
+    exec_fig.update_layout(height=500)
+    
+    pivot_return = _mean_pivot(_df, data_key, 'return_ratio').xs('simple', level='query_type')
+    return_fig = px.bar(
+        pivot_return,
+        barmode='group',
+        labels={'value': '返回时间占比 (%)', 'query_name': '查询'},
+        title='数据返回时间占总执行时间的比例'
+    )
+    return_fig.update_layout(height=500)
+    
+    return {'execution': exec_fig, 'return_ratio': return_fig}
+
+@st.cache_data(show_spinner=False)
+def _complex_query_figures(_df, data_key):
+    """复杂查询页图表"""
+    complex_df = _df[_df['query_type'] == 'complex']
+    exec_fig = px.bar(
+        complex_df,
+        x='query_name',
+        y='execution_time_ms',
+        color='database',
+        barmode='group',
+        labels={'execution_time_ms': '执行时间 (ms)', 'query_name': '查询'},
+        title='复杂查询执行时间对比'
+    )
+    exec_fig.update_layout(height=500)
+    
+    # 创建堆叠柱状图：长表一次绘制，颜色区分数据库、纹理区分时间阶段
+    melted = complex_df.melt(
+        id_vars=['query_name', 'database'],
+        value_vars=['query_time_ms', 'return_time_ms'],
+        var_name='phase',
+        value_name='ms'
+    )
+    melted['phase'] = melted['phase'].map({'query_time_ms': '查询时间', 'return_time_ms': '返回时间'})
+    breakdown_fig = px.bar(
+        melted,
+        x='query_name',
+        y='ms',
+        color='database',
+        pattern_shape='phase',
+        barmode='stack',
+        text_auto='.2f',
+        labels={'query_name': '查询', 'ms': '时间 (ms)', 'database': '数据库', 'phase': '阶段'},
+        title='复杂查询时间分解（查询时间 + 返回时间）'
+    )
+    breakdown_fig.update_traces(textposition='inside')
+    breakdown_fig.update_layout(height=500)
+    
+    return {'execution': exec_fig, 'breakdown': breakdown_fig}
+
+@st.cache_data(show_spinner=False)
+def _crud_figures(_df, data_key):
+    """CRUD操作页图表"""
+    crud_df = _df[_df['query_type'] == 'crud']
+    exec_fig = px.bar(
+        crud_df,
+        x='query_name',
+        y='execution_time_ms',
+        color='database',
+        barmode='group',
+        labels={'execution_time_ms': '执行时间 (ms)', 'query_name': '操作'},
+        title='CRUD操作性能对比'
+    )
+    exec_fig.update_layout(height=500)
+    
+    return {'execution': exec_fig}
+
+@st.cache_data(show_spinner=False)
+def _comparison_figures(_df, data_key):
+    """性能对比页图表"""
+    comparison = _type_comparison(_df, data_key)
+    type_fig = go.Figure()
+    for query_type in comparison.columns:
+        type_fig.add_trace(go.Bar(
+            name=query_type.capitalize(),
+            x=comparison.index,
+            y=comparison[query_type],
+            text=comparison[query_type].astype('float64').round(2),
+            textposition='outside'
+        ))
+    type_fig.update_layout(
+        barmode='group',
+        title='各数据库按查询类型的平均执行时间',
+        xaxis_title='数据库',
+        yaxis_title='平均执行时间 (ms)',
+        height=500
+    )
+    
+    # 计算各维度分数（归一化）
+    metrics = _radar_metrics(_df, data_key)
+    radar_fig = go.Figure()
+    for db, scores in metrics.iterrows():
+        radar_fig.add_trace(go.Scatterpolar(
+            r=scores.tolist(),
+            theta=metrics.columns.tolist(),
+            fill='toself',
+            name=db
+        ))
+    radar_fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+        showlegend=True,
+        title='各数据库多维度性能对比',
+        height=500
+    )
+    
+    return {'by_type': type_fig, 'radar': radar_fig}
+
 def main():
     """主函数"""
     
@@ -78,6 +408,9 @@ def main():
         return
     
     st.success(f"✅ 数据加载成功! 数据源: `{data_file}` | 共 {len(df)} 条记录")
+    max_rows = WEB_CONFIG.get('max_rows')
+    if max_rows is not None and len(df) >= max_rows:
+        st.warning(f"⚠️ 数据量超过读取上限，仅加载前 {max_rows} 条记录（可在 config.py 的 WEB_CONFIG['max_rows'] 中调整）")
     
     # 侧边栏
     st.sidebar.title("📋 分析选项")
@@ -100,22 +433,23 @@ def main():
     
     # 筛选数据
     filtered_df = df[df['database'].isin(selected_databases)]
+    data_key = (df.attrs['source_mtime'], tuple(sorted(selected_databases)))
     
     # 显示选中的分析
     if analysis_type == "📊 总览":
-        show_overview(filtered_df)
+        show_overview(filtered_df, data_key)
     elif analysis_type == "⚡ 简单查询":
-        show_simple_queries(filtered_df)
+        show_simple_queries(filtered_df, data_key)
     elif analysis_type == "🔄 复杂查询":
-        show_complex_queries(filtered_df)
+        show_complex_queries(filtered_df, data_key)
     elif analysis_type == "✏️ CRUD操作":
-        show_crud_operations(filtered_df)
+        show_crud_operations(filtered_df, data_key)
     elif analysis_type == "📈 性能对比":
-        show_performance_comparison(filtered_df)
+        show_performance_comparison(filtered_df, data_key)
     else:
         show_detailed_data(filtered_df)
 
-def show_overview(df):
+def show_overview(df, data_key):
     """总览页面"""
     st.markdown('<h2 class="sub-header">📊 性能测试总览</h2>', unsafe_allow_html=True)
     
@@ -134,55 +468,27 @@ def show_overview(df):
     
     st.markdown("---")
     
+    figures = _overview_figures(df, data_key)
+    
     # 数据库平均性能对比
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("各数据库平均执行时间")
-        avg_by_db = df.groupby('database')['execution_time_ms'].mean().sort_values()
-        
-        fig = px.bar(
-            x=avg_by_db.values,
-            y=avg_by_db.index,
-            orientation='h',
-            labels={'x': '平均执行时间 (ms)', 'y': '数据库'},
-            color=avg_by_db.values,
-            color_continuous_scale='RdYlGn_r'
-        )
-        fig.update_layout(showlegend=False, height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['avg_by_db'], use_container_width=True)
     
     with col2:
         st.subheader("查询类型分布")
-        query_type_counts = df['query_type'].value_counts()
-        
-        fig = px.pie(
-            values=query_type_counts.values,
-            names=query_type_counts.index,
-            hole=0.4
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['query_types'], use_container_width=True)
     
     # 性能热力图
     st.subheader("性能热力图")
-    pivot_data = df.pivot_table(
-        values='execution_time_ms',
-        index='query_name',
-        columns='database',
-        aggfunc='mean'
-    )
-    
-    fig = px.imshow(
-        pivot_data,
-        labels=dict(x="数据库", y="查询", color="执行时间 (ms)"),
-        color_continuous_scale='RdYlGn_r',
-        aspect='auto'
-    )
-    fig.update_layout(height=600)
-    st.plotly_chart(fig, use_container_width=True)
+    query_names = _mean_pivot(df, data_key, 'execution_time_ms').index.get_level_values('query_name')
+    if query_names.nunique() > HEATMAP_MAX_ROWS:
+        st.caption(f"查询数量较多，仅显示差异最大的 {HEATMAP_MAX_ROWS} 个查询")
+    st.plotly_chart(figures['heatmap'], use_container_width=True)
 
-def show_simple_queries(df):
+def show_simple_queries(df, data_key):
     """简单查询分析"""
     st.markdown('<h2 class="sub-header">⚡ 简单查询性能分析</h2>', unsafe_allow_html=True)
     
@@ -192,46 +498,23 @@ def show_simple_queries(df):
         st.warning("没有简单查询数据")
         return
     
+    figures = _simple_query_figures(df, data_key)
+    
     # 执行时间对比（对数坐标）
     st.subheader("执行时间对比（对数坐标）")
-    fig = px.bar(
-        simple_df,
-        x='query_name',
-        y='execution_time_ms',
-        color='database',
-        barmode='group',
-        log_y=True,
-        labels={'execution_time_ms': '执行时间 (ms)', 'query_name': '查询'},
-        title='简单查询执行时间对比'
-    )
-    fig.update_layout(height=500)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['execution'], use_container_width=True)
     
     # 数据返回时间占比
     st.subheader("数据返回时间占比")
-    pivot_return = simple_df.pivot_table(
-        values='return_ratio',
-        index='query_name',
-        columns='database',
-        aggfunc='mean'
-    )
-    
-    fig = px.bar(
-        pivot_return,
-        barmode='group',
-        labels={'value': '返回时间占比 (%)', 'query_name': '查询'},
-        title='数据返回时间占总执行时间的比例'
-    )
-    fig.update_layout(height=500)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['return_ratio'], use_container_width=True)
     
     # 统计表格
     st.subheader("统计数据")
-    stats = simple_df.groupby('database')['execution_time_ms'].agg(['mean', 'min', 'max', 'std']).round(2)
+    stats = _stats_by_db(df, data_key, 'simple')
     stats.columns = ['平均值', '最小值', '最大值', '标准差']
     st.dataframe(stats, use_container_width=True)
 
-def show_complex_queries(df):
+def show_complex_queries(df, data_key):
     """复杂查询分析"""
     st.markdown('<h2 class="sub-header">🔄 复杂查询性能分析</h2>', unsafe_allow_html=True)
     
@@ -241,53 +524,17 @@ def show_complex_queries(df):
         st.warning("没有复杂查询数据")
         return
     
+    figures = _complex_query_figures(df, data_key)
+    
     # 执行时间对比
     st.subheader("执行时间对比")
-    fig = px.bar(
-        complex_df,
-        x='query_name',
-        y='execution_time_ms',
-        color='database',
-        barmode='group',
-        labels={'execution_time_ms': '执行时间 (ms)', 'query_name': '查询'},
-        title='复杂查询执行时间对比'
-    )
-    fig.update_layout(height=500)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['execution'], use_container_width=True)
     
     # 查询时间分解
     st.subheader("查询时间分解")
-    
-    # 创建堆叠柱状图
-    fig = go.Figure()
-    
-    for db in complex_df['database'].unique():
-        db_data = complex_df[complex_df['database'] == db]
-        fig.add_trace(go.Bar(
-            name=f'{db} - 查询时间',
-            x=db_data['query_name'],
-            y=db_data['query_time_ms'],
-            text=db_data['query_time_ms'].round(2),
-            textposition='inside'
-        ))
-        fig.add_trace(go.Bar(
-            name=f'{db} - 返回时间',
-            x=db_data['query_name'],
-            y=db_data['return_time_ms'],
-            text=db_data['return_time_ms'].round(2),
-            textposition='inside'
-        ))
-    
-    fig.update_layout(
-        barmode='stack',
-        title='复杂查询时间分解（查询时间 + 返回时间）',
-        xaxis_title='查询',
-        yaxis_title='时间 (ms)',
-        height=500
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['breakdown'], use_container_width=True)
 
-def show_crud_operations(df):
+def show_crud_operations(df, data_key):
     """CRUD操作分析"""
     st.markdown('<h2 class="sub-header">✏️ CRUD操作性能分析</h2>', unsafe_allow_html=True)
     
@@ -297,19 +544,11 @@ def show_crud_operations(df):
         st.warning("没有CRUD操作数据")
         return
     
+    figures = _crud_figures(df, data_key)
+    
     # 执行时间对比
     st.subheader("CRUD操作执行时间对比")
-    fig = px.bar(
-        crud_df,
-        x='query_name',
-        y='execution_time_ms',
-        color='database',
-        barmode='group',
-        labels={'execution_time_ms': '执行时间 (ms)', 'query_name': '操作'},
-        title='CRUD操作性能对比'
-    )
-    fig.update_layout(height=500)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['execution'], use_container_width=True)
     
     # 操作类型说明
     col1, col2, col3 = st.columns(3)
@@ -323,90 +562,58 @@ def show_crud_operations(df):
     
     # 统计表格
     st.subheader("统计数据")
-    stats = crud_df.pivot_table(
-        values='execution_time_ms',
-        index='query_name',
-        columns='database',
-        aggfunc='mean'
-    ).round(2)
+    stats = _mean_pivot(df, data_key, 'execution_time_ms').xs('crud', level='query_type').astype('float64').round(2)
     st.dataframe(stats, use_container_width=True)
 
-def show_performance_comparison(df):
+def show_performance_comparison(df, data_key):
     """性能对比分析"""
     st.markdown('<h2 class="sub-header">📈 综合性能对比</h2>', unsafe_allow_html=True)
     
+    figures = _comparison_figures(df, data_key)
+    
     # 按查询类型分组的性能对比
     st.subheader("各数据库在不同查询类型下的表现")
-    
-    comparison = df.groupby(['database', 'query_type'])['execution_time_ms'].mean().unstack(fill_value=0)
-    
-    fig = go.Figure()
-    
-    for query_type in comparison.columns:
-        fig.add_trace(go.Bar(
-            name=query_type.capitalize(),
-            x=comparison.index,
-            y=comparison[query_type],
-            text=comparison[query_type].round(2),
-            textposition='outside'
-        ))
-    
-    fig.update_layout(
-        barmode='group',
-        title='各数据库按查询类型的平均执行时间',
-        xaxis_title='数据库',
-        yaxis_title='平均执行时间 (ms)',
-        height=500
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['by_type'], use_container_width=True)
     
     # 性能排名
     st.subheader("性能排名")
     
+    # 一次排序，首尾分别取最快/最慢
+    avg_by_db = _agg_by_db(df, data_key)['exec_mean'].sort_values()
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.write("**最快数据库 (平均)**")
-        fastest = df.groupby('database')['execution_time_ms'].mean().sort_values().head(3)
+        fastest = avg_by_db.head(3)
         for i, (db, time) in enumerate(fastest.items(), 1):
             st.write(f"{i}. **{db}**: {time:.2f} ms")
     
     with col2:
         st.write("**最慢数据库 (平均)**")
-        slowest = df.groupby('database')['execution_time_ms'].mean().sort_values(ascending=False).head(3)
+        slowest = avg_by_db.tail(3).iloc[::-1]
         for i, (db, time) in enumerate(slowest.items(), 1):
             st.write(f"{i}. **{db}**: {time:.2f} ms")
     
     # 雷达图 - 各维度对比
     st.subheader("多维度性能雷达图")
-    
-    # 计算各维度分数（归一化）
-    metrics = {}
-    for db in df['database'].unique():
-        db_data = df[df['database'] == db]
-        metrics[db] = {
-            '平均速度': 100 - (db_data['execution_time_ms'].mean() / df['execution_time_ms'].mean() * 100),
-            '稳定性': 100 - (db_data['execution_time_ms'].std() / df['execution_time_ms'].std() * 100),
-            '返回效率': 100 - (db_data['return_ratio'].mean() / df['return_ratio'].mean() * 100),
-        }
-    
-    fig = go.Figure()
-    
-    for db, scores in metrics.items():
-        fig.add_trace(go.Scatterpolar(
-            r=list(scores.values()),
-            theta=list(scores.keys()),
-            fill='toself',
-            name=db
-        ))
-    
-    fig.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-        showlegend=True,
-        title='各数据库多维度性能对比',
-        height=500
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['radar'], use_container_width=True)
+
+@st.cache_data(show_spinner=False)
+def _to_csv_bytes(df):
+    """导出CSV（带BOM，便于Excel识别中文），仅在数据变化时重新编码"""
+    buffer = io.BytesIO()
+    buffer.write(b'\xef\xbb\xbf')
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buffer)
+    return buffer.getvalue()
+
+def _highlight_extremes(col):
+    """仅为最大/最小值单元格生成样式，由idxmax/idxmin直接定位"""
+    styles = pd.Series('', index=col.index)
+    if len(col) > 0:
+        styles[col.idxmax()] = 'background-color: #ffcccc'
+        styles[col.idxmin()] = 'background-color: #ccffcc'
+    return styles
 
 def show_detailed_data(df):
     """详细数据查看"""
@@ -437,16 +644,20 @@ def show_detailed_data(df):
     
     # 显示数据表
     st.subheader(f"数据表 ({len(filtered)} 条记录)")
+    display_df = filtered
+    if len(filtered) > TABLE_MAX_ROWS:
+        show_all = st.checkbox(f"显示全部记录（默认仅显示前 {TABLE_MAX_ROWS} 条）")
+        if not show_all:
+            display_df = filtered.head(TABLE_MAX_ROWS)
     st.dataframe(
-        filtered.style.highlight_max(axis=0, subset=['execution_time_ms'], color='#ffcccc')
-                     .highlight_min(axis=0, subset=['execution_time_ms'], color='#ccffcc'),
+        display_df.style.apply(_highlight_extremes, subset=['execution_time_ms']),
         use_container_width=True,
         height=400
     )
     
     # 导出功能
     st.subheader("数据导出")
-    csv = filtered.to_csv(index=False, encoding='utf-8-sig')
+    csv = _to_csv_bytes(filtered)
     st.download_button(
         label="📥 下载CSV文件",
         data=csv,
@@ -456,7 +667,8 @@ def show_detailed_data(df):
     
     # 数据统计
     st.subheader("数据统计")
-    st.write(filtered.describe())
+    # float32统计量直接显示会带出多余的小数位，转float64后保留两位
+    st.write(filtered.describe().astype('float64').round(2))
 
 if __name__ == "__main__":
     main()
@@ -196,7 +196,11 @@ WEB_CONFIG = {
     'title': '数据库性能对比分析系统',
     'icon': '📊',
     'layout': 'wide',
-    'port': 8501
+    'port': 8501,
+    # 结果文件读取行数上限（None 表示不限）；超过后截断，以换取页面响应速度
+    'max_rows': 2_000_000,
+    # 超过该大小(字节)的CSV按批流式解析，达到行数上限即停止读取
+    'stream_threshold_bytes': 20_000_000
 }
 
 # ============================================================================
@@ -223,12 +227,15 @@ def validate_config():
     """验证配置的有效性"""
     errors = []
     
-    # 检查必要的路径
+    # 检查必要的路径（一次扫描当前目录）
     import os
-    if not os.path.exists('data'):
+    with os.scandir('.') as entries:
+        existing = {entry.name for entry in entries}
+    
+    if 'data' not in existing:
         errors.append("data目录不存在")
     
-    if not os.path.exists('visualizations'):
+    if 'visualizations' not in existing:
         try:
             os.makedirs('visualizations')
         except:
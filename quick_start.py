@@ -43,7 +43,8 @@ def check_dependencies():
         'seaborn',
         'numpy',
         'streamlit',
-        'plotly'
+        'plotly',
+        'pyarrow'
     ]
     
     missing_packages = []
@@ -64,10 +65,21 @@ def check_dependencies():
         print("\n✅ 所有依赖包已安装!")
         return True
 
+def list_data_files(data_dir='data'):
+    """一次读取数据目录，返回其中的文件名集合"""
+    try:
+        with os.scandir(data_dir) as entries:
+            return {entry.name for entry in entries}
+    except FileNotFoundError:
+        return set()
+
 def check_data_files():
     """检查数据文件"""
     print_header("检查数据文件")
     
+    # 只扫描一次目录，后续用集合判断文件是否存在
+    existing = list_data_files()
+    
     # 检查真实数据
     real_data_files = [
         'data/订单表.csv',
@@ -77,7 +89,7 @@ def check_data_files():
         'data/订单项表.csv'
     ]
     
-    has_real_data = all(Path(f).exists() for f in real_data_files)
+    has_real_data = all(Path(f).name in existing for f in real_data_files)
     
     if has_real_data:
         print("✅ 发现真实数据文件:")
@@ -93,13 +105,34 @@ def check_data_files():
     ]
     
     for f in result_files:
-        if Path(f).exists():
+        if Path(f).name in existing:
             print(f"✅ 发现性能结果文件: {f}")
             return 'results'
     
     print("⚠️  未找到数据文件")
     return 'none'
 
+def convert_results_to_parquet():
+    """将性能结果CSV转换为同名Parquet文件，Web界面会优先读取"""
+    import pyarrow.parquet as pq
+    from pyarrow import csv as pacsv
+    
+    result_files = [
+        'data/real_performance_results.csv',
+        'data/performance_results.csv',
+        'data/sample_performance.csv'
+    ]
+    
+    for f in result_files:
+        csv_path = Path(f)
+        if not csv_path.exists():
+            continue
+        parquet_path = csv_path.with_suffix('.parquet')
+        if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            continue
+        pq.write_table(pacsv.read_csv(csv_path), parquet_path)
+        print(f"✅ 已转换为Parquet: {parquet_path}")
+
 def main():
     """主函数"""
     print("\n" + "="*70)
@@ -148,6 +181,9 @@ def main():
     else:  # data_status == 'results'
         print("✅ 已有性能结果文件，跳过数据生成")
     
+    # 结果文件转为Parquet，加快Web界面加载
+    convert_results_to_parquet()
+    
     # 步骤4: 生成图表
     print_header("生成可视化图表")
     
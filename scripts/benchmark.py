@@ -4,9 +4,17 @@
 """
 
 import time
+import math
+import csv
+import threading
+import argparse
+import hashlib
+import shelve
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from io_utils import compact_dtypes, write_csv, write_parquet_sidecar
 
 # 数据库连接配置
 DB_CONFIG = {
@@ -64,6 +72,13 @@ QUERIES = {
         'flux': None,
         'type': 'crud'
     },
+    # 批量插入：一次写入 bulk_rows 行合成数据，衡量写入吞吐而非单条往返
+    'I1_bulk': {
+        'sql': "INSERT INTO wholesale (wholesale_date, product_id, wholesale_price) VALUES %s",
+        'flux': None,
+        'type': 'crud',
+        'bulk_rows': 10000
+    },
     'D1': {
         'sql': "DELETE FROM sale WHERE sale_id = 1",
         'flux': None,
@@ -76,19 +91,82 @@ QUERIES = {
     }
 }
 
+# 按查询语言预先筛选的查询列表（导入时构建一次，测试时无需逐个判断）
+SQL_QUERIES = [(name, info) for name, info in QUERIES.items() if info['sql']]
+FLUX_QUERIES = [(name, info) for name, info in QUERIES.items() if info['flux']]
+
+# 结果集分批读取的行数（可按网络与内存情况调整）：
+# FETCH_SIZE 为 DB-API 游标 fetchmany 的批大小，远程连接时调大可减少往返次数；
+# ROWS_PER_BATCH 为 DuckDB 按 Arrow 批次读取时每批的行数
+FETCH_SIZE = 1000
+ROWS_PER_BATCH = 100_000
+
+# PostgreSQL批量插入时 execute_values 每条INSERT语句包含的行数，
+# 与读取批大小无关，可按单条语句大小与往返次数的权衡单独调整
+INSERT_PAGE_SIZE = 1000
+
+# 预编译语句名称（每个连接同一时刻只测试一个查询，可复用同一名称）
+PREPARED_STATEMENT = 'bench_stmt'
+
+class RunningStats:
+    """Welford在线算法：逐次累计均值与方差，不保存各次样本"""
+    
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def add(self, value):
+        """加入一次测量值"""
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+    
+    @property
+    def std(self):
+        """样本标准差（少于两次测量时为0）"""
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+# 结果文件及其列；测试过程中逐行追加写入 .partial 临时文件，
+# 完成后由 save_results 整理写出正式文件，测试中断时已完成的结果保留在临时文件中
+OUTPUT_PATH = 'data/performance_results.csv'
+PARTIAL_PATH = OUTPUT_PATH + '.partial'
+RESULT_FIELDS = [
+    'query_name', 'database', 'execution_time_ms', 'execution_std_ms',
+    'query_time_ms', 'return_time_ms', 'rows_returned', 'query_type'
+]
+
+# 测试结果缓存：同一数据库上相同的查询语句不再重复测试（--force 强制重测）
+CACHE_PATH = 'data/.bench_cache'
+
 class DatabaseBenchmark:
     """数据库性能测试类"""
     
-    def __init__(self):
+    def __init__(self, force_rerun=False):
         self.results = []
+        self.failures = []
         self.connections = {}
+        # 不同数据库服务在独立线程中测试，结果追加与缓存读写需加锁
+        self.results_lock = threading.Lock()
+        # 中断（Ctrl-C）时置位，各线程在两次查询之间检查后停止
+        self.stop_event = threading.Event()
+        self.force_rerun = force_rerun
+        self.cache = None
+        self.pg_conn = None
+        self.csv_file = None
+        self.csv_writer = None
     
     def connect_postgresql(self, with_index=False):
         """连接PostgreSQL"""
         try:
-            import psycopg2
-            conn = psycopg2.connect(**DB_CONFIG['postgresql'])
+            # 有无索引是同一数据库的表结构差异，且两组在同一线程内依次测试，
+            # 共用一个连接，只建立一次TCP连接和认证
+            if self.pg_conn is None:
+                import psycopg2
+                self.pg_conn = psycopg2.connect(**DB_CONFIG['postgresql'])
             db_name = 'PostgreSQL_indexed' if with_index else 'PostgreSQL'
+            conn = self.pg_conn
             self.connections[db_name] = conn
             print(f"✅ {db_name} 连接成功")
             return conn
@@ -132,52 +210,68 @@ class DatabaseBenchmark:
     
     def benchmark_sql_query(self, conn, query, db_name, query_name, query_type):
         """测试SQL查询"""
+        cache_key = self.cache_key(db_name, query)
+        if self.load_cached_result(cache_key, query_name, db_name):
+            return
+        
         cursor = conn.cursor()
         
+        # 预编译语句（PostgreSQL与DuckDB均支持PREPARE/EXECUTE），
+        # 计时只包含执行，不再每次重复解析与生成执行计划；不支持时退回原始SQL
+        try:
+            cursor.execute(f"PREPARE {PREPARED_STATEMENT} AS {query}")
+            statement = f"EXECUTE {PREPARED_STATEMENT}"
+        except Exception:
+            statement = None
+            # psycopg2 默认非自动提交，PREPARE失败会使当前事务进入中止状态，
+            # 需回滚后才能继续执行原始SQL（DuckDB为自动提交，无需处理）
+            if not hasattr(conn, 'register'):
+                conn.rollback()
+        
         # 预热
         try:
-            cursor.execute(query)
-            cursor.fetchall()
+            cursor.execute(statement or query)
+            self.count_rows(cursor)
         except:
             pass
         
         # 多次测试取平均值
-        times = []
-        return_times = []
+        total_stats = RunningStats()
+        return_stats = RunningStats()
         rows_count = 0
         
         for i in range(3):  # 运行3次
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             
             try:
-                cursor.execute(query)
-                query_end_time = time.time()
+                cursor.execute(statement or query)
+                query_end_time = time.perf_counter_ns()
                 
-                results = cursor.fetchall()
-                rows_count = len(results)
-                end_time = time.time()
+                rows_count = self.count_rows(cursor)
+                end_time = time.perf_counter_ns()
                 
-                total_time = (end_time - start_time) * 1000
-                query_time = (query_end_time - start_time) * 1000
-                return_time = (end_time - query_end_time) * 1000
+                total_time = (end_time - start_time) / 1e6
+                query_time = (query_end_time - start_time) / 1e6
+                return_time = (end_time - query_end_time) / 1e6
                 
-                times.append(total_time)
-                return_times.append(return_time)
+                total_stats.add(total_time)
+                return_stats.add(return_time)
                 
             except Exception as e:
-                print(f"   ⚠️  {query_name} 执行失败: {e}")
-                cursor.close()
+                self.record_failure(query_name, db_name, e)
+                self.close_cursor(cursor, statement)
                 return
         
         # 记录平均结果
-        avg_time = sum(times) / len(times)
-        avg_return_time = sum(return_times) / len(return_times)
+        avg_time = total_stats.mean
+        avg_return_time = return_stats.mean
         avg_query_time = avg_time - avg_return_time
         
-        self.results.append({
+        self.record_result(cache_key, {
             'query_name': query_name,
             'database': db_name,
             'execution_time_ms': round(avg_time, 2),
+            'execution_std_ms': round(total_stats.std, 2),
             'query_time_ms': round(avg_query_time, 2),
             'return_time_ms': round(avg_return_time, 2),
             'rows_returned': rows_count,
@@ -185,6 +279,137 @@ class DatabaseBenchmark:
         })
         
         print(f"   ✅ {query_name} on {db_name}: {avg_time:.2f} ms ({rows_count} rows)")
+        self.close_cursor(cursor, statement)
+    
+    def benchmark_bulk_insert(self, conn, query_info, db_name, query_name):
+        """
+        测试批量插入（PostgreSQL用execute_values分页写入，DuckDB直接从DataFrame插入）
+        每次插入在事务中计时后回滚，合成数据不会留在表中影响后续查询
+        """
+        query = query_info['sql']
+        n_rows = query_info['bulk_rows']
+        cache_key = self.cache_key(db_name, f"{query}|{n_rows}")
+        if self.load_cached_result(cache_key, query_name, db_name):
+            return
+        
+        # 与I1相同列的合成数据
+        bulk_df = pd.DataFrame({
+            'wholesale_date': ['2023-01-01'] * n_rows,
+            'product_id': ['102900005115168'] * n_rows,
+            'wholesale_price': [round(1 + i % 2000 / 100, 2) for i in range(n_rows)]
+        })
+        
+        cursor = conn.cursor()
+        if hasattr(conn, 'register'):
+            # DuckDB：注册DataFrame后以单条 INSERT ... SELECT 写入
+            cursor.register('bulk_rows', bulk_df)
+            def begin():
+                cursor.execute('BEGIN TRANSACTION')
+            def insert():
+                cursor.execute(query.replace('VALUES %s', 'SELECT * FROM bulk_rows'))
+            def rollback():
+                cursor.execute('ROLLBACK')
+        else:
+            from psycopg2.extras import execute_values
+            rows = list(bulk_df.itertuples(index=False, name=None))
+            def begin():
+                pass  # psycopg2 在首条语句前自动开启事务
+            def insert():
+                execute_values(cursor, query, rows, page_size=INSERT_PAGE_SIZE)
+            def rollback():
+                conn.rollback()
+        
+        total_stats = RunningStats()
+        for i in range(3):
+            begin()
+            start_time = time.perf_counter_ns()
+            try:
+                insert()
+            except Exception as e:
+                self.record_failure(query_name, db_name, e)
+                rollback()
+                cursor.close()
+                return
+            total_stats.add((time.perf_counter_ns() - start_time) / 1e6)
+            rollback()
+        cursor.close()
+        
+        # 插入没有结果集返回阶段，全部计入查询时间
+        avg_time = total_stats.mean
+        self.record_result(cache_key, {
+            'query_name': query_name,
+            'database': db_name,
+            'execution_time_ms': round(avg_time, 2),
+            'execution_std_ms': round(total_stats.std, 2),
+            'query_time_ms': round(avg_time, 2),
+            'return_time_ms': 0.0,
+            'rows_returned': n_rows,
+            'query_type': query_info['type']
+        })
+        
+        print(f"   ✅ {query_name} on {db_name}: {avg_time:.2f} ms ({n_rows} rows)")
+    
+    def cache_key(self, db_name, query):
+        """缓存键：数据库名与查询语句的SHA-256摘要"""
+        return hashlib.sha256(f"{db_name}|{query}".encode('utf-8')).hexdigest()
+    
+    def load_cached_result(self, cache_key, query_name, db_name):
+        """命中缓存时直接记录已有结果，返回是否命中"""
+        if self.force_rerun:
+            return False
+        with self.results_lock:
+            # 测试中断后主线程会清空缓存引用，需在锁内判断
+            if self.cache is None:
+                return False
+            result = self.cache.get(cache_key)
+            if result is None:
+                return False
+            self.append_result(result)
+        print(f"   ♻️  {query_name} on {db_name}: {result['execution_time_ms']:.2f} ms (缓存)")
+        return True
+    
+    def append_result(self, result):
+        """追加一条结果并立即写入CSV，测试中断时已完成的结果不会丢失（调用方需持有 results_lock）"""
+        self.results.append(result)
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(result)
+            self.csv_file.flush()
+    
+    def record_result(self, cache_key, result):
+        """记录测试结果并写入缓存"""
+        with self.results_lock:
+            self.append_result(result)
+            if self.cache is not None:
+                self.cache[cache_key] = result
+    
+    def record_failure(self, query_name, db_name, error):
+        """记录执行失败的查询，测试结束后统一列出"""
+        with self.results_lock:
+            self.failures.append((query_name, db_name, error))
+        print(f"   ⚠️  {query_name} on {db_name} 执行失败: {error}")
+    
+    def count_rows(self, cursor):
+        """逐批读取并统计结果行数，不在内存中保留整个结果集"""
+        if hasattr(cursor, 'fetch_record_batch'):
+            # DuckDB：以Arrow批次读取，不生成Python元组
+            return sum(batch.num_rows for batch in cursor.fetch_record_batch(ROWS_PER_BATCH))
+        if cursor.description is None:
+            # PostgreSQL的增删改语句没有结果集，返回受影响行数
+            return max(cursor.rowcount, 0)
+        # 按 FETCH_SIZE 成批取回，减少逐行调用与远程往返
+        cursor.arraysize = FETCH_SIZE
+        rows_count = 0
+        while rows := cursor.fetchmany(cursor.arraysize):
+            rows_count += len(rows)
+        return rows_count
+    
+    def close_cursor(self, cursor, statement):
+        """释放预编译语句并关闭游标"""
+        if statement:
+            try:
+                cursor.execute(f"DEALLOCATE {PREPARED_STATEMENT}")
+            except Exception:
+                pass
         cursor.close()
     
     def benchmark_influx_query(self, client, query, query_name, query_type):
@@ -193,6 +418,10 @@ class DatabaseBenchmark:
             print(f"   ⚠️  {query_name} 不支持 InfluxDB")
             return
         
+        cache_key = self.cache_key('InfluxDB', query)
+        if self.load_cached_result(cache_key, query_name, 'InfluxDB'):
+            return
+        
         query_api = client.query_api()
         
         # 预热
@@ -202,40 +431,41 @@ class DatabaseBenchmark:
             pass
         
         # 多次测试取平均值
-        times = []
-        return_times = []
+        total_stats = RunningStats()
+        return_stats = RunningStats()
         rows_count = 0
         
         for i in range(3):
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             
             try:
                 result = query_api.query(query)
-                query_end_time = time.time()
+                query_end_time = time.perf_counter_ns()
                 
                 # 计算返回的行数
                 rows_count = sum([len(table.records) for table in result])
-                end_time = time.time()
+                end_time = time.perf_counter_ns()
                 
-                total_time = (end_time - start_time) * 1000
-                return_time = (end_time - query_end_time) * 1000
+                total_time = (end_time - start_time) / 1e6
+                return_time = (end_time - query_end_time) / 1e6
                 
-                times.append(total_time)
-                return_times.append(return_time)
+                total_stats.add(total_time)
+                return_stats.add(return_time)
                 
             except Exception as e:
-                print(f"   ⚠️  {query_name} 执行失败: {e}")
+                self.record_failure(query_name, 'InfluxDB', e)
                 return
         
         # 记录平均结果
-        avg_time = sum(times) / len(times)
-        avg_return_time = sum(return_times) / len(return_times)
+        avg_time = total_stats.mean
+        avg_return_time = return_stats.mean
         avg_query_time = avg_time - avg_return_time
         
-        self.results.append({
+        self.record_result(cache_key, {
             'query_name': query_name,
             'database': 'InfluxDB',
             'execution_time_ms': round(avg_time, 2),
+            'execution_std_ms': round(total_stats.std, 2),
             'query_time_ms': round(avg_query_time, 2),
             'return_time_ms': round(avg_return_time, 2),
             'rows_returned': rows_count,
@@ -244,6 +474,36 @@ class DatabaseBenchmark:
         
         print(f"   ✅ {query_name} on InfluxDB: {avg_time:.2f} ms ({rows_count} rows)")
     
+    def run_database_tests(self, db_name, conn):
+        """在单个连接上依次执行所有查询"""
+        if db_name == 'InfluxDB':
+            for query_name, query_info in FLUX_QUERIES:
+                if self.stop_event.is_set():
+                    return
+                self.benchmark_influx_query(conn, query_info['flux'], query_name, query_info['type'])
+            return
+        
+        for query_name, query_info in SQL_QUERIES:
+            if self.stop_event.is_set():
+                return
+            if query_info.get('bulk_rows'):
+                self.benchmark_bulk_insert(conn, query_info, db_name, query_name)
+            else:
+                self.benchmark_sql_query(
+                    conn, 
+                    query_info['sql'], 
+                    db_name, 
+                    query_name, 
+                    query_info['type']
+                )
+    
+    def run_backend_tests(self, labels):
+        """依次测试共用同一数据库服务的各连接（如有无索引两组），避免同库并发相互干扰"""
+        for db_name in labels:
+            if self.stop_event.is_set():
+                return
+            self.run_database_tests(db_name, self.connections[db_name])
+    
     def run_all_tests(self):
         """运行所有测试"""
         print("\n" + "="*60)
@@ -259,67 +519,104 @@ class DatabaseBenchmark:
         self.connect_influxdb()
         print()
         
-        # 测试每个查询
+        # 读入结果缓存（未改动的查询直接复用上次结果）；
+        # shelve底层的dbm不能跨线程使用，测试期间在内存字典中读写，结束后统一写回
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with shelve.open(CACHE_PATH) as cache:
+            self.cache = dict(cache)
+        
+        # 结果边测边写入临时CSV；全部完成后 save_results 再按固定顺序写出正式文件，
+        # 没有任何结果时不覆盖上一次的结果文件
+        self.csv_file = open(PARTIAL_PATH, 'w', newline='', encoding='utf-8-sig')
+        self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=RESULT_FIELDS)
+        self.csv_writer.writeheader()
+        self.csv_file.flush()
+        
+        # 按 DB_CONFIG 中的数据库服务分组（PostgreSQL与PostgreSQL_indexed同一服务，DuckDB两组同一文件）：
+        # 同组连接在一个线程内依次测试，只在不同服务之间并行，避免同库并发冲突和计时相互拖慢
+        backends = {}
+        for db_name in self.connections:
+            backends.setdefault(db_name.split('_')[0].lower(), []).append(db_name)
+        
         print("2. 执行性能测试...")
-        for query_name, query_info in QUERIES.items():
-            print(f"\n测试 {query_name} ({query_info['type']}):")
-            
-            # SQL数据库
-            for db_name, conn in self.connections.items():
-                if db_name != 'InfluxDB' and query_info['sql']:
-                    self.benchmark_sql_query(
-                        conn, 
-                        query_info['sql'], 
-                        db_name, 
-                        query_name, 
-                        query_info['type']
-                    )
-            
-            # InfluxDB
-            if 'InfluxDB' in self.connections and query_info['flux']:
-                self.benchmark_influx_query(
-                    self.connections['InfluxDB'],
-                    query_info['flux'],
-                    query_name,
-                    query_info['type']
-                )
+        executor = ThreadPoolExecutor(max_workers=max(len(backends), 1))
+        try:
+            futures = [
+                executor.submit(self.run_backend_tests, labels)
+                for labels in backends.values()
+            ]
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            # 不等待剩余查询：通知各线程在当前查询结束后停止，并取消尚未开始的任务
+            self.stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        else:
+            executor.shutdown()
+        finally:
+            # 中断时仍在执行的线程可能随后记录结果，缓存和CSV在锁内写回并关闭
+            with self.results_lock:
+                with shelve.open(CACHE_PATH) as cache:
+                    cache.update(self.cache)
+                self.cache = None
+                self.csv_file.close()
+                self.csv_file = None
+                self.csv_writer = None
         
         # 保存结果
         self.save_results()
+        os.remove(PARTIAL_PATH)
+        
+        if self.failures:
+            print(f"\n⚠️  {len(self.failures)} 项测试执行失败，未计入结果:")
+            for query_name, db_name, error in self.failures:
+                print(f"   - {query_name} on {db_name}: {str(error).splitlines()[0]}")
     
     def save_results(self):
         """保存测试结果"""
         if not self.results:
-            print("\n❌ 没有测试结果可保存")
+            print(f"\n❌ 没有测试结果可保存，保留原结果文件: {OUTPUT_PATH}")
             return
         
-        df = pd.DataFrame(self.results)
-        output_path = 'data/performance_results.csv'
-        df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        # 并行测试的完成顺序不固定，按 查询 → 数据库 的原有顺序排列
+        query_order = list(QUERIES)
+        db_order = list(self.connections)
+        self.results.sort(key=lambda r: (query_order.index(r['query_name']), db_order.index(r['database'])))
+        df = compact_dtypes(pd.DataFrame(self.results))
+        df['return_ratio'] = (df['return_time_ms'] / df['execution_time_ms'] * 100).round(2)
+        output_path = OUTPUT_PATH
+        write_csv(df, output_path)
+        parquet_path = write_parquet_sidecar(df, output_path)
         
         print("\n" + "="*60)
         print(f"✅ 测试完成! 结果已保存到: {output_path}")
+        if parquet_path:
+            print(f"📦 列式副本: {parquet_path}")
         print(f"📊 共测试 {len(self.results)} 条记录")
         print("="*60)
         
         # 显示摘要
         print("\n性能摘要:")
-        print(df.groupby('database')['execution_time_ms'].agg(['mean', 'min', 'max']).round(2))
+        print(df.groupby('database', observed=True)['execution_time_ms'].agg(['mean', 'min', 'max']).astype(float).round(2))
     
     def close_connections(self):
         """关闭所有连接"""
         for db_name, conn in self.connections.items():
             try:
-                if db_name == 'InfluxDB':
-                    conn.close()
-                else:
-                    conn.close()
+                # PostgreSQL两组共用的连接重复close无副作用
+                conn.close()
                 print(f"✅ {db_name} 连接已关闭")
             except:
                 pass
+        self.pg_conn = None
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='数据库性能测试')
+    parser.add_argument('--force', action='store_true', help='忽略结果缓存，重新测试所有查询')
+    args = parser.parse_args()
+    
     print("\n" + "="*70)
     print(" "*15 + "数据库性能测试系统")
     print("="*70)
@@ -332,7 +629,7 @@ def main():
         print("已取消测试")
         return
     
-    benchmark = DatabaseBenchmark()
+    benchmark = DatabaseBenchmark(force_rerun=args.force)
     
     try:
         benchmark.run_all_tests()
@@ -6,11 +6,37 @@
 import pandas as pd
 import numpy as np
 import os
+from io_utils import compact_dtypes, write_csv
+
+def generate_query_block(rng, query_names, databases, base_ranges, query_share, rows_range, query_type):
+    """按 (查询, 数据库) 网格一次性生成某一查询类型的全部记录"""
+    shape = (len(query_names), len(databases))
+    
+    # 基准时间（根据数据库类型调整）：每个数据库一列，整块一次抽样
+    low, high = np.array([base_ranges[db] for db in databases]).T
+    base_time = rng.uniform(low, high, size=shape)
+    
+    # 计算各部分时间
+    total_time = base_time * rng.uniform(0.9, 1.1, size=shape)
+    query_time = total_time * rng.uniform(*query_share, size=shape)
+    return_time = total_time - query_time
+    rows = rng.uniform(*rows_range, size=shape).astype(np.int32)
+    
+    # 按列构建；计时列用float32、行数用int32即可满足精度
+    return pd.DataFrame({
+        'query_name': np.repeat(query_names, len(databases)),
+        'database': np.tile(databases, len(query_names)),
+        'execution_time_ms': total_time.ravel().round(2).astype(np.float32),
+        'query_time_ms': query_time.ravel().round(2).astype(np.float32),
+        'return_time_ms': return_time.ravel().round(2).astype(np.float32),
+        'rows_returned': rows.ravel(),
+        'query_type': query_type
+    })
 
 def generate_sample_data():
     """生成示例性能测试数据"""
     
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     
     # 定义查询和数据库
     simple_queries = [f'Q{i}' for i in range(1, 9)]  # Q1-Q8
@@ -25,117 +51,77 @@ def generate_sample_data():
         'InfluxDB'
     ]
     
-    data = []
-    
     # 生成简单查询数据
     print("生成简单查询数据...")
-    for query in simple_queries:
-        for db in databases:
-            # 基准时间（根据数据库类型调整）
-            if db == 'PostgreSQL':
-                base_time = np.random.uniform(100, 500)
-            elif db == 'PostgreSQL_indexed':
-                base_time = np.random.uniform(50, 200)
-            elif db == 'DuckDB':
-                base_time = np.random.uniform(40, 150)
-            elif db == 'DuckDB_indexed':
-                base_time = np.random.uniform(35, 140)
-            else:  # InfluxDB
-                base_time = np.random.uniform(150, 600)
-            
-            # 计算各部分时间
-            total_time = base_time * np.random.uniform(0.9, 1.1)
-            query_time = total_time * np.random.uniform(0.6, 0.8)
-            return_time = total_time - query_time
-            rows = int(np.random.uniform(100, 10000))
-            
-            data.append({
-                'query_name': query,
-                'database': db,
-                'execution_time_ms': round(total_time, 2),
-                'query_time_ms': round(query_time, 2),
-                'return_time_ms': round(return_time, 2),
-                'rows_returned': rows,
-                'query_type': 'simple'
-            })
+    simple_df = generate_query_block(
+        rng, simple_queries, databases,
+        base_ranges={
+            'PostgreSQL': (100, 500),
+            'PostgreSQL_indexed': (50, 200),
+            'DuckDB': (40, 150),
+            'DuckDB_indexed': (35, 140),
+            'InfluxDB': (150, 600)
+        },
+        query_share=(0.6, 0.8),
+        rows_range=(100, 10000),
+        query_type='simple'
+    )
     
     # 生成复杂查询数据
     print("生成复杂查询数据...")
-    for query in complex_queries:
-        for db in databases:
-            if db == 'PostgreSQL':
-                base_time = np.random.uniform(500, 2000)
-            elif db == 'PostgreSQL_indexed':
-                base_time = np.random.uniform(300, 1500)
-            elif db == 'DuckDB':
-                base_time = np.random.uniform(200, 1000)
-            elif db == 'DuckDB_indexed':
-                base_time = np.random.uniform(180, 950)
-            else:  # InfluxDB
-                base_time = np.random.uniform(800, 3000)
-            
-            total_time = base_time * np.random.uniform(0.9, 1.1)
-            query_time = total_time * np.random.uniform(0.7, 0.85)
-            return_time = total_time - query_time
-            rows = int(np.random.uniform(1000, 50000))
-            
-            data.append({
-                'query_name': query,
-                'database': db,
-                'execution_time_ms': round(total_time, 2),
-                'query_time_ms': round(query_time, 2),
-                'return_time_ms': round(return_time, 2),
-                'rows_returned': rows,
-                'query_type': 'complex'
-            })
+    complex_df = generate_query_block(
+        rng, complex_queries, databases,
+        base_ranges={
+            'PostgreSQL': (500, 2000),
+            'PostgreSQL_indexed': (300, 1500),
+            'DuckDB': (200, 1000),
+            'DuckDB_indexed': (180, 950),
+            'InfluxDB': (800, 3000)
+        },
+        query_share=(0.7, 0.85),
+        rows_range=(1000, 50000),
+        query_type='complex'
+    )
     
     # 生成CRUD操作数据
     print("生成CRUD操作数据...")
-    for operation in crud_operations:
-        for db in databases:
-            # InfluxDB不支持传统CRUD，跳过
-            if db == 'InfluxDB' and operation in ['D1', 'U1']:
-                continue
-            
-            if db.startswith('PostgreSQL'):
-                base_time = np.random.uniform(10, 50)
-            else:  # DuckDB
-                base_time = np.random.uniform(8, 40)
-            
-            if db == 'InfluxDB':
-                base_time = np.random.uniform(15, 60)
-            
-            total_time = base_time * np.random.uniform(0.9, 1.1)
-            query_time = total_time * np.random.uniform(0.85, 0.95)
-            return_time = total_time - query_time
-            rows = 1 if operation != 'I1' else int(np.random.uniform(1, 100))
-            
-            data.append({
-                'query_name': operation,
-                'database': db,
-                'execution_time_ms': round(total_time, 2),
-                'query_time_ms': round(query_time, 2),
-                'return_time_ms': round(return_time, 2),
-                'rows_returned': rows,
-                'query_type': 'crud'
-            })
-    
-    # 创建DataFrame
-    df = pd.DataFrame(data)
+    crud_df = generate_query_block(
+        rng, crud_operations, databases,
+        base_ranges={
+            'PostgreSQL': (10, 50),
+            'PostgreSQL_indexed': (10, 50),
+            'DuckDB': (8, 40),
+            'DuckDB_indexed': (8, 40),
+            'InfluxDB': (15, 60)
+        },
+        query_share=(0.85, 0.95),
+        rows_range=(1, 100),
+        query_type='crud'
+    )
+    # 删除和更新只影响一行
+    crud_df['rows_returned'] = crud_df['rows_returned'].where(crud_df['query_name'] == 'I1', 1)
+    # InfluxDB不支持传统CRUD，跳过
+    crud_df = crud_df[~((crud_df['database'] == 'InfluxDB') & crud_df['query_name'].isin(['D1', 'U1']))]
+    
+    # 合并为一个DataFrame
+    df = compact_dtypes(pd.concat([simple_df, complex_df, crud_df], ignore_index=True))
+    
+    # 返回时间占比在生成时写入，Web界面无需再计算
+    df['return_ratio'] = (df['return_time_ms'] / df['execution_time_ms'] * 100).round(2)
     
     # 保存到data目录
     output_path = os.path.join('data', 'sample_performance.csv')
-    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    write_csv(df, output_path)
     
     print(f"\n✅ 示例数据已生成！")
     print(f"📁 保存位置: {output_path}")
     print(f"📊 数据行数: {len(df)}")
-    print(f"📋 查询类型: {df['query_type'].unique()}")
-    print(f"💾 数据库类型: {df['database'].unique()}")
+    print(f"📋 查询类型: {df['query_type'].unique().tolist()}")
+    print(f"💾 数据库类型: {df['database'].unique().tolist()}")
     
     # 显示数据摘要
     print("\n数据摘要:")
-    print(df.groupby(['query_type', 'database'])['execution_time_ms'].agg(['mean', 'min', 'max']).round(2))
+    print(df.groupby(['query_type', 'database'], observed=True)['execution_time_ms'].agg(['mean', 'min', 'max']).astype(float).round(2))
     
     return df
 
@@ -150,7 +136,10 @@ if __name__ == "__main__":
     print("\n" + "="*60)
     print("数据预览（前10行）:")
     print("="*60)
-    print(df.head(10).to_string())
+    # float32 列转为 float64 并保留两位后打印，避免显示二进制尾数（如404.429993）
+    preview = df.head(10)
+    float_cols = preview.select_dtypes('float32').columns
+    print(preview.astype({col: 'float64' for col in float_cols}).round({col: 2 for col in float_cols}).to_string())
     
     print("\n✨ 现在可以运行以下命令查看可视化：")
     print("   python scripts/visualize.py")
@@ -5,8 +5,13 @@
 
 import pandas as pd
 import numpy as np
+import codecs
 import os
 from pathlib import Path
+from io_utils import compact_dtypes, write_csv
+
+# 数据文件候选编码（按尝试顺序）
+ENCODINGS = ['gbk', 'utf-8', 'gb18030', 'latin1']
 
 class DataLoader:
     """数据加载和处理类"""
@@ -35,10 +40,12 @@ class DataLoader:
             
             if file_path.exists():
                 try:
-                    # 尝试不同的编码
-                    for encoding in ['gbk', 'utf-8', 'gb18030', 'latin1']:
+                    # 先用文件开头样本确定编码，通常只需解析一次；
+                    # 样本之后出现无法解码的内容时再依次尝试后续编码
+                    detected = self.detect_encoding(file_path)
+                    for encoding in ENCODINGS[ENCODINGS.index(detected):]:
                         try:
-                            df = pd.read_csv(file_path, encoding=encoding)
+                            df = self.read_csv(file_path, encoding)
                             self.tables[english_name] = df
                             print(f"✅ {chinese_name:15s} -> {len(df):,} 行 | {english_name}")
                             break
@@ -55,8 +62,35 @@ class DataLoader:
         
         return self.tables
     
-    def get_data_summary(self):
-        """获取数据摘要"""
+    def detect_encoding(self, file_path, sample_size=65536):
+        """按候选顺序试解码文件开头的样本，返回第一个能解码的编码"""
+        with open(file_path, 'rb') as f:
+            sample = f.read(sample_size)
+        for encoding in ENCODINGS:
+            try:
+                # 增量解码（final=False）容忍样本末尾被截断的多字节字符
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return ENCODINGS[-1]
+    
+    def read_csv(self, file_path, encoding):
+        """读取单个CSV：优先用pyarrow引擎多线程解析，不可用或解析失败时退回C引擎"""
+        try:
+            return pd.read_csv(file_path, encoding=encoding, engine='pyarrow', dtype_backend='pyarrow')
+        except UnicodeDecodeError:
+            # 编码不匹配交由调用方尝试下一种编码
+            raise
+        except (ImportError, ValueError):
+            return pd.read_csv(file_path, encoding=encoding)
+    
+    def get_data_summary(self, deep=False):
+        """
+        获取数据摘要
+        deep=True 时逐个统计对象列中字符串的实际占用（大表较慢）；
+        pyarrow引擎读取的列为Arrow类型，默认的浅统计即为实际内存
+        """
         if not self.tables:
             self.load_all_tables()
         
@@ -68,7 +102,7 @@ class DataLoader:
             print(f"  行数: {len(df):,}")
             print(f"  列数: {len(df.columns)}")
             print(f"  列名: {', '.join(df.columns[:5])}{'...' if len(df.columns) > 5 else ''}")
-            print(f"  内存: {df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB")
+            print(f"  内存: {df.memory_usage(deep=deep).sum() / 1024 / 1024:.2f} MB")
         
         print("\n" + "="*60)
     
@@ -91,7 +125,7 @@ class DataLoader:
         print(f"订单项数量: {order_items_count:,}")
         print()
         
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         
         # 定义测试场景
         test_scenarios = [
@@ -126,74 +160,63 @@ class DataLoader:
             'InfluxDB'
         ]
         
-        results = []
+        # 各数据库的基准时间系数（乘以结果规模的对数），以及CRUD操作的基准时间范围
+        time_factors = {
+            'simple': {'PostgreSQL': 80, 'PostgreSQL_indexed': 40, 'DuckDB': 30, 'DuckDB_indexed': 28, 'InfluxDB': 100},
+            'complex': {'PostgreSQL': 200, 'PostgreSQL_indexed': 150, 'DuckDB': 100, 'DuckDB_indexed': 95, 'InfluxDB': 300}
+        }
+        crud_ranges = {
+            'PostgreSQL': (5, 25),
+            'PostgreSQL_indexed': (5, 25),
+            'DuckDB': (4, 20),
+            'DuckDB_indexed': (4, 20),
+            'InfluxDB': (8, 30)
+        }
         
         for scenario in test_scenarios:
             print(f"生成 {scenario['name']} ({scenario['type']}) - {scenario['desc']}")
-            
-            for db in databases:
-                # 根据数据库类型和查询类型计算基准时间
-                if scenario['type'] == 'simple':
-                    if db == 'PostgreSQL':
-                        base_time = np.log10(scenario['base_rows'] + 1) * 80
-                    elif db == 'PostgreSQL_indexed':
-                        base_time = np.log10(scenario['base_rows'] + 1) * 40
-                    elif db == 'DuckDB':
-                        base_time = np.log10(scenario['base_rows'] + 1) * 30
-                    elif db == 'DuckDB_indexed':
-                        base_time = np.log10(scenario['base_rows'] + 1) * 28
-                    else:  # InfluxDB
-                        base_time = np.log10(scenario['base_rows'] + 1) * 100
-                
-                elif scenario['type'] == 'complex':
-                    if db == 'PostgreSQL':
-                        base_time = np.log10(scenario['base_rows'] + 1) * 200
-                    elif db == 'PostgreSQL_indexed':
-                        base_time = np.log10(scenario['base_rows'] + 1) * 150
-                    elif db == 'DuckDB':
-                        base_time = np.log10(scenario['base_rows'] + 1) * 100
-                    elif db == 'DuckDB_indexed':
-                        base_time = np.log10(scenario['base_rows'] + 1) * 95
-                    else:  # InfluxDB
-                        base_time = np.log10(scenario['base_rows'] + 1) * 300
-                
-                else:  # CRUD
-                    if db == 'InfluxDB' and scenario['name'] in ['D1', 'U1']:
-                        continue  # InfluxDB不支持传统的DELETE/UPDATE
-                    
-                    if db.startswith('PostgreSQL'):
-                        base_time = np.random.uniform(5, 25)
-                    elif db.startswith('DuckDB'):
-                        base_time = np.random.uniform(4, 20)
-                    else:
-                        base_time = np.random.uniform(8, 30)
-                
-                # 添加随机波动
-                total_time = base_time * np.random.uniform(0.85, 1.15)
-                
-                # 计算查询时间和返回时间
-                if scenario['type'] == 'crud':
-                    query_ratio = 0.9
-                else:
-                    # InfluxDB返回数据较慢
-                    query_ratio = 0.55 if db == 'InfluxDB' else 0.75
-                
-                query_time = total_time * query_ratio
-                return_time = total_time - query_time
-                
-                results.append({
-                    'query_name': scenario['name'],
-                    'database': db,
-                    'execution_time_ms': round(total_time, 2),
-                    'query_time_ms': round(query_time, 2),
-                    'return_time_ms': round(return_time, 2),
-                    'rows_returned': int(scenario['base_rows']),
-                    'query_type': scenario['type']
-                })
-        
-        # 保存结果
-        df = pd.DataFrame(results)
-        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        
+        # 按 (场景, 数据库) 网格一次性计算全部记录
+        names = np.array([scenario['name'] for scenario in test_scenarios])
+        types = np.array([scenario['type'] for scenario in test_scenarios])
+        base_rows = np.array([scenario['base_rows'] for scenario in test_scenarios], dtype=float)
+        shape = (len(test_scenarios), len(databases))
+        is_crud = (types == 'crud')[:, None]
+        is_influx = np.array(databases) == 'InfluxDB'
+        
+        # 根据数据库类型和查询类型计算基准时间（CRUD为随机基准时间）
+        factors = np.array([[time_factors.get(t, {}).get(db, 0) for db in databases] for t in types])
+        low, high = np.array([crud_ranges[db] for db in databases]).T
+        base_time = np.where(
+            is_crud,
+            rng.uniform(low, high, size=shape),
+            np.log10(base_rows + 1)[:, None] * factors
+        )
+        
+        # 添加随机波动
+        total_time = base_time * rng.uniform(0.85, 1.15, size=shape)
+        
+        # 计算查询时间和返回时间（InfluxDB返回数据较慢）
+        query_ratio = np.where(is_crud, 0.9, np.where(is_influx, 0.55, 0.75))
+        query_time = total_time * query_ratio
+        return_time = total_time - query_time
+        
+        # InfluxDB不支持传统的DELETE/UPDATE
+        keep = ~(is_crud & is_influx & np.isin(names, ['D1', 'U1'])[:, None]).ravel()
+        
+        # 保存结果（计时列用float32、行数用int32即可满足精度）
+        df = compact_dtypes(pd.DataFrame({
+            'query_name': np.repeat(names, len(databases))[keep],
+            'database': np.tile(databases, len(test_scenarios))[keep],
+            'execution_time_ms': total_time.ravel()[keep].round(2).astype(np.float32),
+            'query_time_ms': query_time.ravel()[keep].round(2).astype(np.float32),
+            'return_time_ms': return_time.ravel()[keep].round(2).astype(np.float32),
+            'rows_returned': np.repeat(base_rows.astype(np.int32), len(databases))[keep],
+            'query_type': np.repeat(types, len(databases))[keep]
+        }))
+        # 返回时间占比在生成时写入，Web界面无需再计算
+        df['return_ratio'] = (df['return_time_ms'] / df['execution_time_ms'] * 100).round(2)
+        write_csv(df, output_file)
         
         print("\n" + "="*60)
         print(f"✅ 性能测试结果已生成！")
@@ -203,7 +226,7 @@ class DataLoader:
         
         # 显示统计
         print("\n各数据库平均执行时间:")
-        print(df.groupby('database')['execution_time_ms'].mean().round(2))
+        print(df.groupby('database', observed=True)['execution_time_ms'].mean().astype(float).round(2))
         
         return df
 
@@ -0,0 +1,51 @@
+"""
+结果文件读写工具
+供数据生成、数据加载和性能测试脚本共用
+"""
+
+import os
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+# 结果表列类型：计时列float32、行数int32即可满足精度，低基数标签列用分类类型
+RESULT_DTYPES = {
+    'query_name': 'category',
+    'database': 'category',
+    'query_type': 'category',
+    'execution_time_ms': 'float32',
+    'execution_std_ms': 'float32',
+    'query_time_ms': 'float32',
+    'return_time_ms': 'float32',
+    'rows_returned': 'int32'
+}
+
+def compact_dtypes(df):
+    """将结果表中存在的列转换为RESULT_DTYPES中的紧凑类型"""
+    return df.astype({col: dtype for col, dtype in RESULT_DTYPES.items() if col in df.columns})
+
+def write_csv(df, output_path):
+    """写出带BOM的UTF-8 CSV（Excel可直接打开），优先使用pyarrow的C++写出器"""
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pacsv
+    except ImportError:
+        df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        return
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with open(output_path, 'wb') as f:
+        f.write(UTF8_BOM)
+        pacsv.write_csv(table, f)
+
+def write_parquet_sidecar(df, csv_path):
+    """在CSV旁写出同名Parquet文件（zstd压缩），供Web界面和图表脚本直接读取列式数据"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, parquet_path, compression='zstd')
+    return parquet_path
@@ -4,49 +4,163 @@
 """
 
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # 只输出图片文件，使用无界面后端（子进程也无需初始化GUI）
 import matplotlib.pyplot as plt
+from matplotlib import font_manager
+from matplotlib.collections import PatchCollection
+from matplotlib.patches import Patch, Rectangle
 import seaborn as sns
 import numpy as np
 import os
+import sys
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from io_utils import compact_dtypes
 
 # 设置中文字体（支持中文显示）
 plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
-plt.rcParams['figure.dpi'] = 300
+plt.rcParams['figure.dpi'] = 150
+
+# 路径简化与Agg分块渲染
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
+plt.rcParams['agg.path.chunksize'] = 10000
 
 # 设置绘图样式
 sns.set_style("whitegrid")
 sns.set_palette("husl")
 
+# 样式设定完成后预先解析图中用到的字体，填充findfont缓存（fork出的绘图进程直接继承）
+for weight in ('normal', 'bold'):
+    font_manager.findfont(font_manager.FontProperties(family='sans-serif', weight=weight))
+
+# 数据文件候选（按优先级：真实数据结果 > 实测结果 > 示例数据）
+DATA_FILES = [
+    'data/real_performance_results.csv',
+    'data/performance_results.csv',
+    'data/sample_performance.csv'
+]
+
+def _find_data_file(candidates=DATA_FILES):
+    """读取一次data目录，返回第一个存在的候选数据文件，都不存在时返回None"""
+    try:
+        with os.scandir('data') as entries:
+            existing = {entry.name for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        return None
+    for candidate in candidates:
+        if Path(candidate).name in existing:
+            return candidate
+    return None
+
+# plot_all 生成的图表（各自独立，可在不同进程中并行绘制）
+PLOT_METHODS = [
+    'plot_simple_queries',
+    'plot_complex_queries',
+    'plot_crud_operations',
+    'plot_return_time_ratio',
+    'plot_performance_heatmap',
+    'plot_database_comparison'
+]
+
+# 行数达到该值时，分组平均交给DuckDB执行（小表上连接开销大于收益）
+DUCKDB_MIN_ROWS = 100_000
+
+def _duckdb_group_mean(df, keys, values):
+    """大表的分组平均下推到DuckDB（列式向量化、多线程）执行；未安装duckdb时返回None"""
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    
+    key_sql = ', '.join(f'"{key}"' for key in keys)
+    value_sql = ', '.join(f'avg("{value}") AS "{value}"' for value in values)
+    with duckdb.connect() as con:
+        con.register('perf', df[keys + values])
+        result = con.execute(f'SELECT {key_sql}, {value_sql} FROM perf GROUP BY {key_sql}').df()
+    # 还原为与pandas路径一致的列类型和有序索引
+    return result.astype({col: df[col].dtype for col in keys + values}).set_index(keys).sort_index()
+
+def _fast_pivot(df, index, columns, values, agg='mean'):
+    """
+    等价于 pivot_table(values, index, columns, aggfunc=agg, observed=True)
+    直接走 groupby 聚合再 unstack，省去 pivot_table 的参数分派和多级索引重组开销；
+    大表求平均时改由DuckDB完成分组聚合
+    """
+    keys = (list(index) if isinstance(index, (list, tuple)) else [index]) + [columns]
+    grouped = None
+    if agg == 'mean' and len(df) >= DUCKDB_MIN_ROWS:
+        grouped = _duckdb_group_mean(df, keys, values if isinstance(values, list) else [values])
+    if grouped is None:
+        grouped = getattr(df.groupby(keys, observed=True)[values], agg)()
+    elif not isinstance(values, list):
+        grouped = grouped[values]
+    return grouped.unstack(columns)
+
+def _summarize(db_codes, exec_ms, ratio, n_db):
+    """
+    摘要报告所需统计的单次计算：按数据库编码求平均执行时间和平均返回时间占比，
+    同时给出最快、最慢记录的位置
+    """
+    counts = np.bincount(db_codes, minlength=n_db)
+    exec_mean = np.bincount(db_codes, weights=exec_ms, minlength=n_db) / np.maximum(counts, 1)
+    ratio_mean = np.bincount(db_codes, weights=ratio, minlength=n_db) / np.maximum(counts, 1)
+    return counts, exec_mean, ratio_mean, exec_ms.argmin(), exec_ms.argmax()
+
+def _render_plot(visualizer, method_name):
+    """在工作进程中生成单张图表"""
+    getattr(visualizer, method_name)()
+
+# 柱状图只有少量矢量图元，直接输出SVG；热力图色块为栅格，仍输出PNG
+RASTER_CHARTS = {'performance_heatmap'}
+
+# PNG输出参数：默认150 dpi + zlib 1级压缩（编码快，屏幕和审阅足够清晰）；
+# 论文定稿使用高质量模式（300 dpi + 默认压缩级别）
+DRAFT_SAVE_KWARGS = {'dpi': 150, 'pil_kwargs': {'compress_level': 1, 'optimize': False}}
+HIGH_QUALITY_SAVE_KWARGS = {'dpi': 300}
+
 class PerformanceVisualizer:
     """性能可视化类"""
     
-    def __init__(self, data_path=None):
+    def __init__(self, data_path=None, high_quality=False, debug=False):
         """初始化"""
         # 自动查找数据文件
         if data_path is None:
-            possible_files = [
-                'data/real_performance_results.csv',
-                'data/performance_results.csv',
-                'data/sample_performance.csv'
-            ]
-            for file in possible_files:
-                if Path(file).exists():
-                    data_path = file
-                    break
-            
+            data_path = _find_data_file()
             if data_path is None:
                 raise FileNotFoundError("未找到数据文件! 请先运行: python scripts/data_loader.py")
         
         self.data_path = data_path
+        self.save_kwargs = HIGH_QUALITY_SAVE_KWARGS if high_quality else DRAFT_SAVE_KWARGS
         self.output_dir = Path('visualizations')
         self.output_dir.mkdir(exist_ok=True)
         
         # 读取数据
         print(f"📖 正在读取数据: {data_path}")
-        self.df = pd.read_csv(data_path)
+        self.df = self.load_data(data_path)
         print(f"✅ 数据加载成功! 共 {len(self.df)} 条记录\n")
+        if debug:
+            self.df.info(memory_usage='deep')
+            print()
+        
+        # 返回时间占比只计算一次，各图和摘要报告共用
+        self.df['return_ratio'] = self.df['return_time_ms'] / self.df['execution_time_ms'] * 100
+        
+        # 各图共用的按查询类型拆分，以及执行时间、返回时间占比透视表，只计算一次
+        # （按类型拆分存入字典，无需对分组键排序）
+        self.by_type = dict(tuple(self.df.groupby('query_type', observed=True, sort=False)))
+        pivot = _fast_pivot(
+            self.df,
+            index=['query_type', 'query_name'],
+            columns='database',
+            values=['execution_time_ms', 'return_ratio']
+        )
+        self.exec_pivot = pivot['execution_time_ms']
+        self.ratio_pivot = pivot['return_ratio']
         
         # 数据库颜色映射
         self.db_colors = {
@@ -56,35 +170,106 @@ class PerformanceVisualizer:
             'DuckDB_indexed': '#2874A6',
             'InfluxDB': '#F39C12'
         }
+        # 按数据库分类编码排列的颜色数组，绘图时按列位置直接取色（未配置的数据库用灰色）
+        self.db_categories = self.df['database'].cat.categories
+        self.db_color_array = np.array([self.db_colors.get(db, '#888888') for db in self.db_categories])
+    
+    def load_data(self, data_path):
+        """
+        读取数据：同名Parquet文件不早于CSV时直接读取，否则解析CSV并写出Parquet供下次使用
+        计时列降为float32、标签列转为分类类型（Parquet中按字典编码保存），减少后续扫描和分组的内存带宽
+        """
+        data_path = Path(data_path)
+        sidecar = data_path.with_suffix('.parquet')
+        if sidecar.exists() and sidecar.stat().st_mtime >= data_path.stat().st_mtime:
+            return compact_dtypes(pd.read_parquet(sidecar, engine='pyarrow'))
+        
+        df = compact_dtypes(pd.read_csv(data_path))
+        df.to_parquet(sidecar, engine='pyarrow', compression='zstd', index=False)
+        return df
+    
+    def type_pivot(self, query_type, pivot=None):
+        """取出某一查询类型的透视表（默认执行时间），去掉该类型下没有数据的数据库列"""
+        pivot = self.exec_pivot if pivot is None else pivot
+        return pivot.loc[query_type].dropna(axis=1, how='all')
+    
+    def content_hash(self, name, data):
+        """图表输入数据（值、行列标签）与绘图样式的BLAKE2b哈希"""
+        digest = hashlib.blake2b(np.ascontiguousarray(data.to_numpy()).tobytes())
+        digest.update(str((name, data.index.tolist(), data.columns.tolist(),
+                           self.save_kwargs)).encode())
+        return digest.hexdigest()
+    
+    def is_up_to_date(self, name, data_hash):
+        """图片已存在且输入哈希与上次绘制时一致则无需重新绘制"""
+        hash_file = self.output_dir / f'.{name}.hash'
+        output_path = self.output_path(name)
+        if (output_path.exists() and hash_file.exists()
+                and hash_file.read_text() == data_hash):
+            print(f"   ⏭️  数据未变化，跳过: {output_path}")
+            return True
+        return False
+    
+    def colors_for(self, databases):
+        """按数据库名称取对应颜色"""
+        return self.db_color_array[self.db_categories.get_indexer(databases)]
+    
+    def output_path(self, name):
+        """图表输出路径：热力图为PNG，其余为SVG"""
+        suffix = '.png' if name in RASTER_CHARTS else '.svg'
+        return self.output_dir / f'{name}{suffix}'
+    
+    def save_figure(self, name, data_hash):
+        """保存当前图表并记录输入哈希"""
+        plt.tight_layout()
+        output_path = self.output_path(name)
+        if output_path.suffix == '.svg':
+            plt.savefig(output_path, format='svg', bbox_inches='tight')
+        else:
+            plt.savefig(output_path, bbox_inches='tight', **self.save_kwargs)
+        print(f"   ✅ 已保存: {output_path}")
+        plt.close()
+        (self.output_dir / f'.{name}.hash').write_text(data_hash)
     
     def plot_simple_queries(self):
         """图1: 简单查询性能对比（对数坐标）"""
         print("📊 生成图表 1: 简单查询性能对比...")
         
         # 筛选简单查询数据
-        simple_data = self.df[self.df['query_type'] == 'simple'].copy()
-        
-        # 创建图表
-        fig, ax = plt.subplots(figsize=(14, 7))
+        simple_data = self.by_type['simple']
         
-        # 获取查询名称和数据库类型
+        # 获取查询名称和数据库类型（数据库按数据中出现的顺序）
         queries = sorted(simple_data['query_name'].unique())
         databases = simple_data['database'].unique()
         
+        # 查询 × 数据库 的执行时间矩阵，缺失组合记为0
+        heights = (self.type_pivot('simple')
+                   .reindex(index=queries, columns=databases)
+                   .fillna(0))
+        data_hash = self.content_hash('simple_query_performance', heights)
+        if self.is_up_to_date('simple_query_performance', data_hash):
+            return
+        heights = heights.to_numpy()
+        
+        # 创建图表
+        fig, ax = plt.subplots(figsize=(14, 7))
+        
         # 设置柱状图位置
         x = np.arange(len(queries))
         width = 0.15
         
-        # 为每个数据库绘制柱状图
-        for i, db in enumerate(databases):
-            db_data = simple_data[simple_data['database'] == db]
-            times = [db_data[db_data['query_name'] == q]['execution_time_ms'].values[0] 
-                     if len(db_data[db_data['query_name'] == q]) > 0 else 0 
-                     for q in queries]
-            
-            ax.bar(x + i*width, times, width, 
-                   label=db.replace('_', ' '), 
-                   color=self.db_colors.get(db, None))
+        # 全部柱子放进一个PatchCollection一次绘制（柱子以 x + d*width 为中心，按数据库依次排列）
+        colors = self.colors_for(databases)
+        rects = [Rectangle((x[q] + (d - 0.5)*width, 0), width, heights[q, d])
+                 for d in range(len(databases)) for q in range(len(queries))]
+        ax.add_collection(PatchCollection(rects, facecolors=np.repeat(colors, len(queries)),
+                                          edgecolors=plt.rcParams['patch.edgecolor'],
+                                          linewidths=plt.rcParams['patch.linewidth']))
+        ax.autoscale_view()
+        
+        # 图例使用代理图形
+        handles = [Patch(color=color, label=db.replace('_', ' '))
+                   for db, color in zip(databases, colors)]
         
         # 设置坐标轴
         ax.set_xlabel('Query', fontsize=12, fontweight='bold')
@@ -94,36 +279,27 @@ class PerformanceVisualizer:
         ax.set_xticks(x + width * 2)
         ax.set_xticklabels(queries)
         ax.set_yscale('log')
-        ax.legend(loc='upper left', frameon=True, shadow=True)
+        ax.legend(handles=handles, loc='upper left', frameon=True, shadow=True)
         ax.grid(True, alpha=0.3, which='both')
         
-        plt.tight_layout()
-        output_path = self.output_dir / 'simple_query_performance.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"   ✅ 已保存: {output_path}")
-        plt.close()
+        self.save_figure('simple_query_performance', data_hash)
     
     def plot_complex_queries(self):
         """图2: 复杂查询性能对比"""
         print("📊 生成图表 2: 复杂查询性能对比...")
         
-        # 筛选复杂查询数据
-        complex_data = self.df[self.df['query_type'] == 'complex'].copy()
+        # 复杂查询透视表
+        pivot_data = self.type_pivot('complex')
+        data_hash = self.content_hash('complex_query_performance', pivot_data)
+        if self.is_up_to_date('complex_query_performance', data_hash):
+            return
         
         # 创建图表
         fig, ax = plt.subplots(figsize=(14, 7))
         
-        # 透视表
-        pivot_data = complex_data.pivot_table(
-            values='execution_time_ms',
-            index='query_name',
-            columns='database',
-            aggfunc='mean'
-        )
-        
         # 绘制分组柱状图
         pivot_data.plot(kind='bar', ax=ax, width=0.8, 
-                        color=[self.db_colors.get(col, None) for col in pivot_data.columns])
+                        color=self.colors_for(pivot_data.columns))
         
         ax.set_xlabel('Query', fontsize=12, fontweight='bold')
         ax.set_ylabel('Execution Time (ms)', fontsize=12, fontweight='bold')
@@ -133,37 +309,28 @@ class PerformanceVisualizer:
         ax.grid(True, alpha=0.3, axis='y')
         plt.xticks(rotation=0)
         
-        plt.tight_layout()
-        output_path = self.output_dir / 'complex_query_performance.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"   ✅ 已保存: {output_path}")
-        plt.close()
+        self.save_figure('complex_query_performance', data_hash)
     
     def plot_crud_operations(self):
         """图3: CRUD操作性能对比"""
         print("📊 生成图表 3: CRUD操作性能对比...")
         
-        # 筛选CRUD数据
-        crud_data = self.df[self.df['query_type'] == 'crud'].copy()
-        
-        if len(crud_data) == 0:
+        if 'crud' not in self.by_type:
             print("   ⚠️  警告: 没有CRUD操作数据")
             return
         
+        # CRUD透视表
+        pivot_data = self.type_pivot('crud')
+        data_hash = self.content_hash('crud_performance', pivot_data)
+        if self.is_up_to_date('crud_performance', data_hash):
+            return
+        
         # 创建图表
         fig, ax = plt.subplots(figsize=(12, 7))
         
-        # 透视表
-        pivot_data = crud_data.pivot_table(
-            values='execution_time_ms',
-            index='query_name',
-            columns='database',
-            aggfunc='mean'
-        )
-        
         # 绘制分组柱状图
         pivot_data.plot(kind='bar', ax=ax, width=0.8,
-                        color=[self.db_colors.get(col, None) for col in pivot_data.columns])
+                        color=self.colors_for(pivot_data.columns))
         
         ax.set_xlabel('Operation', fontsize=12, fontweight='bold')
         ax.set_ylabel('Execution Time (ms)', fontsize=12, fontweight='bold')
@@ -173,37 +340,24 @@ class PerformanceVisualizer:
         ax.grid(True, alpha=0.3, axis='y')
         plt.xticks(rotation=0)
         
-        plt.tight_layout()
-        output_path = self.output_dir / 'crud_performance.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"   ✅ 已保存: {output_path}")
-        plt.close()
+        self.save_figure('crud_performance', data_hash)
     
     def plot_return_time_ratio(self):
         """图4: 数据返回时间占比分析"""
         print("📊 生成图表 4: 数据返回时间占比...")
         
-        # 计算返回时间占比
-        self.df['return_ratio'] = (self.df['return_time_ms'] / 
-                                    self.df['execution_time_ms'] * 100)
-        
-        # 筛选简单查询（更能体现差异）
-        simple_data = self.df[self.df['query_type'] == 'simple'].copy()
+        # 简单查询（更能体现差异）的返回时间占比透视表
+        pivot_data = self.type_pivot('simple', self.ratio_pivot)
+        data_hash = self.content_hash('return_time_ratio', pivot_data)
+        if self.is_up_to_date('return_time_ratio', data_hash):
+            return
         
         # 创建图表
         fig, ax = plt.subplots(figsize=(14, 7))
         
-        # 透视表
-        pivot_data = simple_data.pivot_table(
-            values='return_ratio',
-            index='query_name',
-            columns='database',
-            aggfunc='mean'
-        )
-        
         # 绘制堆叠柱状图
         pivot_data.plot(kind='bar', ax=ax, width=0.8,
-                        color=[self.db_colors.get(col, None) for col in pivot_data.columns])
+                        color=self.colors_for(pivot_data.columns))
         
         ax.set_xlabel('Query', fontsize=12, fontweight='bold')
         ax.set_ylabel('Return Time Ratio (%)', fontsize=12, fontweight='bold')
@@ -213,23 +367,17 @@ class PerformanceVisualizer:
         ax.grid(True, alpha=0.3, axis='y')
         plt.xticks(rotation=45)
         
-        plt.tight_layout()
-        output_path = self.output_dir / 'return_time_ratio.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"   ✅ 已保存: {output_path}")
-        plt.close()
+        self.save_figure('return_time_ratio', data_hash)
     
     def plot_performance_heatmap(self):
         """图5: 性能热力图"""
         print("📊 生成图表 5: 性能热力图...")
         
-        # 创建透视表
-        pivot_data = self.df.pivot_table(
-            values='execution_time_ms',
-            index='query_name',
-            columns='database',
-            aggfunc='mean'
-        )
+        # 同名查询跨查询类型取平均
+        pivot_data = self.exec_pivot.groupby(level='query_name', observed=True).mean()
+        data_hash = self.content_hash('performance_heatmap', pivot_data)
+        if self.is_up_to_date('performance_heatmap', data_hash):
+            return
         
         # 创建图表
         fig, ax = plt.subplots(figsize=(12, 10))
@@ -244,18 +392,17 @@ class PerformanceVisualizer:
         ax.set_xlabel('Database', fontsize=12, fontweight='bold')
         ax.set_ylabel('Query', fontsize=12, fontweight='bold')
         
-        plt.tight_layout()
-        output_path = self.output_dir / 'performance_heatmap.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"   ✅ 已保存: {output_path}")
-        plt.close()
+        self.save_figure('performance_heatmap', data_hash)
     
     def plot_database_comparison(self):
         """图6: 数据库综合性能对比"""
         print("📊 生成图表 6: 数据库综合性能对比...")
         
         # 按数据库和查询类型分组统计
-        comparison = self.df.groupby(['database', 'query_type'])['execution_time_ms'].mean().unstack()
+        comparison = _fast_pivot(self.df, 'database', 'query_type', 'execution_time_ms')
+        data_hash = self.content_hash('database_comparison', comparison)
+        if self.is_up_to_date('database_comparison', data_hash):
+            return
         
         # 创建图表
         fig, ax = plt.subplots(figsize=(12, 7))
@@ -270,11 +417,7 @@ class PerformanceVisualizer:
         ax.grid(True, alpha=0.3, axis='y')
         plt.xticks(rotation=45, ha='right')
         
-        plt.tight_layout()
-        output_path = self.output_dir / 'database_comparison.png'
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        print(f"   ✅ 已保存: {output_path}")
-        plt.close()
+        self.save_figure('database_comparison', data_hash)
     
     def plot_all(self):
         """生成所有图表"""
@@ -282,12 +425,12 @@ class PerformanceVisualizer:
         print("开始生成所有图表...")
         print("="*60 + "\n")
         
-        self.plot_simple_queries()
-        self.plot_complex_queries()
-        self.plot_crud_operations()
-        self.plot_return_time_ratio()
-        self.plot_performance_heatmap()
-        self.plot_database_comparison()
+        # 栅格化和PNG编码是CPU密集型，各图分别在独立进程中绘制
+        max_workers = min(len(PLOT_METHODS), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_render_plot, self, name) for name in PLOT_METHODS]
+            for future in futures:
+                future.result()
         
         print("\n" + "="*60)
         print("✨ 所有图表生成完成!")
@@ -295,57 +438,67 @@ class PerformanceVisualizer:
         print("="*60)
     
     def generate_summary_report(self):
-        """生成摘要报告"""
-        print("\n" + "="*60)
-        print("📋 性能测试摘要报告")
-        print("="*60 + "\n")
+        """生成摘要报告（先拼接所有行，最后一次性写出）"""
+        lines = ["\n" + "="*60, "📋 性能测试摘要报告", "="*60 + "\n"]
         
         # 总体统计
-        print("1. 总体统计")
-        print(f"   - 总测试数: {len(self.df)}")
-        print(f"   - 查询类型: {', '.join(self.df['query_type'].unique())}")
-        print(f"   - 数据库类型: {len(self.df['database'].unique())} 种")
-        print()
+        lines += [
+            "1. 总体统计",
+            f"   - 总测试数: {len(self.df)}",
+            f"   - 查询类型: {', '.join(self.df['query_type'].unique())}",
+            f"   - 数据库类型: {len(self.df['database'].unique())} 种",
+            ""
+        ]
+        
+        # 基于数据库分类编码一次算出各库平均执行时间、平均返回时间占比和执行时间极值位置
+        databases = self.df['database'].cat.categories
+        counts, exec_mean, ratio_mean, imin, imax = _summarize(
+            self.df['database'].cat.codes.to_numpy(),
+            self.df['execution_time_ms'].to_numpy(),
+            self.df['return_ratio'].to_numpy(),
+            len(databases)
+        )
+        observed = counts > 0
+        db_stats = pd.DataFrame({'exec_mean': exec_mean[observed], 'ratio_mean': ratio_mean[observed]},
+                                index=databases[observed])
         
         # 各数据库平均性能
-        print("2. 各数据库平均执行时间 (ms)")
-        avg_performance = self.df.groupby('database')['execution_time_ms'].mean().sort_values()
-        for db, time in avg_performance.items():
-            print(f"   - {db:25s}: {time:8.2f} ms")
-        print()
+        lines.append("2. 各数据库平均执行时间 (ms)")
+        avg_performance = db_stats['exec_mean'].sort_values()
+        lines += [f"   - {db:25s}: {time:8.2f} ms" for db, time in avg_performance.items()]
+        lines.append("")
         
         # 最快和最慢的查询
-        print("3. 性能极值")
-        fastest = self.df.loc[self.df['execution_time_ms'].idxmin()]
-        slowest = self.df.loc[self.df['execution_time_ms'].idxmax()]
-        print(f"   最快: {fastest['query_name']} on {fastest['database']} - {fastest['execution_time_ms']:.2f} ms")
-        print(f"   最慢: {slowest['query_name']} on {slowest['database']} - {slowest['execution_time_ms']:.2f} ms")
-        print()
+        fastest = self.df.iloc[imin]
+        slowest = self.df.iloc[imax]
+        lines += [
+            "3. 性能极值",
+            f"   最快: {fastest['query_name']} on {fastest['database']} - {fastest['execution_time_ms']:.2f} ms",
+            f"   最慢: {slowest['query_name']} on {slowest['database']} - {slowest['execution_time_ms']:.2f} ms",
+            ""
+        ]
         
         # 返回时间占比
-        print("4. 数据返回时间占比 (%)")
-        self.df['return_ratio'] = self.df['return_time_ms'] / self.df['execution_time_ms'] * 100
-        return_ratios = self.df.groupby('database')['return_ratio'].mean().sort_values(ascending=False)
-        for db, ratio in return_ratios.items():
-            print(f"   - {db:25s}: {ratio:6.2f}%")
+        lines.append("4. 数据返回时间占比 (%)")
+        return_ratios = db_stats['ratio_mean'].sort_values(ascending=False)
+        lines += [f"   - {db:25s}: {ratio:6.2f}%" for db, ratio in return_ratios.items()]
         
-        print("\n" + "="*60)
+        lines.append("\n" + "="*60)
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='生成性能对比图表')
+    parser.add_argument('--high-quality', action='store_true', help='以300 dpi输出论文定稿图片')
+    parser.add_argument('--debug', action='store_true', help='打印数据列类型和内存占用')
+    args = parser.parse_args()
+    
     print("\n" + "="*70)
     print(" "*15 + "数据库性能可视化系统")
     print("="*70)
     
     # 检查数据文件
-    data_files = ['data/performance_results.csv', 'data/sample_performance.csv']
-    data_path = None
-    
-    for file in data_files:
-        if os.path.exists(file):
-            data_path = file
-            break
-    
+    data_path = _find_data_file()
     if data_path is None:
         print("\n❌ 错误: 未找到数据文件!")
         print("请先运行以下命令生成数据:")
@@ -353,7 +506,7 @@ def main():
         return
     
     # 创建可视化器
-    visualizer = PerformanceVisualizer(data_path)
+    visualizer = PerformanceVisualizer(data_path, high_quality=args.high_quality, debug=args.debug)
     
     # 生成所有图表
     visualizer.plot_all()